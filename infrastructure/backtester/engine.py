@@ -1,7 +1,60 @@
+import os
+
+import numpy as np
 import pandas as pd
 
-from performance_metrics import calculate_all_metrics, build_realized_equity_curve
-from visualizer import plot_results, plot_trades_on_price
+from performance_metrics import (
+    calculate_all_metrics, calculate_calmar_ratio, calculate_benchmark_equity,
+    build_realized_equity_curve,
+    _HAS_NUMBA,
+)
+
+# numexpr (optional) fuses chained elementwise arithmetic into one multi-threaded
+# pass with no per-operator temporaries; NumPy is used when it isn't installed
+try:
+    import numexpr as _ne
+except ImportError:
+    _ne = None
+
+
+def _lag1(values, fill=0.0):
+    """Shift an array forward by one bar (execution lag); NaNs become `fill`."""
+    out     = np.empty(len(values), dtype=np.float64)
+    out[:1] = fill
+    out[1:] = values[:-1]
+    out[np.isnan(out)] = fill
+    return out
+
+
+def _narrow_position(values):
+    """
+    Signals in {-1, 0, 1} are stored as int8 (1 byte per bar instead of 8), so
+    position-change arithmetic streams an eighth of the memory.  Anything else
+    (fractional positions, NaN) stays float64.
+    """
+    if len(values) and np.isin(values, (-1, 0, 1)).all():
+        return values.astype(np.int8)
+    return values.astype(np.float64)
+
+
+def _trades_path(path):
+    """
+    Sibling path for the trades chart: 'run.json.gz' -> 'run_trades.json.gz',
+    'run.html' -> 'run_trades.html', 'run' -> 'run_trades'.  Only the file
+    name changes, so the trades chart never overwrites the main one.
+    """
+    gz = '.gz' if path.endswith('.gz') else ''
+    root, ext = os.path.splitext(path[:len(path) - len(gz)])
+    return f"{root}_trades{ext}{gz}"
+
+
+def _pct_change(close):
+    """Bar-over-bar simple returns of a price array; first bar is NaN."""
+    out     = np.empty(len(close), dtype=np.float64)
+    out[:1] = np.nan
+    out[1:] = close[1:] / close[:-1] - 1.0
+    return out
+
 
 """ 
 Args:
@@ -14,6 +67,7 @@ Args:
     cost: Trading cost as % per trade
     show_plot: Display chart (default True)
     save_html: Save as HTML file (optional)
+    save_json: Save the figure as Plotly JSON, gzipped if path ends in .gz (optional)
     show_trades: Show trade markers on price chart (default False)
     benchmark_data: Buy & hold comparison (default: uses data['Close'])
     
@@ -22,41 +76,44 @@ Returns:
  """
 
 
-def backtest(data, cost=0.0, show_plot=True, save_html=None, show_trades=False, benchmark_data=None):
-
-    df = data.copy()
+def backtest(data, cost=0.0, show_plot=True, save_html=None, show_trades=False, benchmark_data=None,
+             save_json=None):
 
-    if 'position' not in df.columns:
+    if 'position' not in data.columns:
         raise ValueError("Data must have 'position' column (1=long, 0=flat, -1=short)")
 
+    # work on raw column arrays — no copy of the caller's frame, no per-operator
+    # index alignment; only the columns downstream consumers read are assembled
+    # into a DataFrame at the end.
+    index    = data.index
+    position = data['position'].to_numpy()
+    pos      = _narrow_position(position)
+
     # decide which return stream to use
-    use_precomputed = 'strategy_returns' in df.columns
+    use_precomputed = 'strategy_returns' in data.columns
+
+    # buy & hold of data['Close'] is the default benchmark for single-asset runs
+    default_benchmark = benchmark_data is None and not use_precomputed
 
     if not use_precomputed:
-        if 'Close' not in df.columns:
+        if 'Close' not in data.columns:
             raise ValueError("Data must have 'Close' column OR a precomputed 'strategy_returns' column")
 
-        if benchmark_data is None:
-            benchmark_data = df[['Close']].copy()
-
-        df['returns'] = df['Close'].pct_change()
-        raw_strategy_returns = df['returns']
+        # upcast even when the frame holds float32 prices (get_data(dtype=np.float32)):
+        # bar returns and the compounded equity need float64 precision
+        close                = data['Close'].to_numpy(dtype=np.float64)
+        raw_strategy_returns = _pct_change(close)
     else:
         # strategy_returns should already be the per-bar return of the strategy
         # eg for pairs: ret_y - b*ret_x
-        raw_strategy_returns = df['strategy_returns'].copy()
-
-        # if no benchmark supplied, skip benchmark by default
-        if benchmark_data is None:
-            benchmark_data = None
+        # (no benchmark by default when none is supplied)
+        raw_strategy_returns = data['strategy_returns'].to_numpy(dtype=np.float64)
 
     # apply position sizing and 1-bar shift
-    eff_pos  = df['position'].shift(1).fillna(0)
-    eff_size = (df['position_size'].shift(1).fillna(0)
-                if 'position_size' in df.columns
-                else pd.Series(1.0, index=df.index))
-
-    df['effective_position'] = eff_pos * eff_size
+    eff_pos  = _lag1(pos)
+    eff_size = (_lag1(data['position_size'].to_numpy(dtype=np.float64))
+                if 'position_size' in data.columns
+                else np.ones(len(pos)))
 
     # costs based on position changes (used for trade annotation / pairs cost)
     # If the strategy supplies an explicit 'turnover' column (fractional portfolio
@@ -64,11 +121,19 @@ def backtest(data, cost=0.0, show_plot=True, save_html=None, show_trades=False,
     # This lets portfolio strategies charge accurate partial-turnover costs without
     # baking them into strategy_returns.  Single-asset strategies that don't return
     # a 'turnover' column are unaffected.
-    df['position_change'] = df['position'].diff().abs()
-    if 'turnover' in df.columns:
-        df['trade_cost'] = df['turnover'].fillna(0.0) * cost
+    # |Δposition| as two in-place ufuncs over one buffer of pos's dtype (int8
+    # lanes for plain signals) — no diff()/abs() temporaries
+    pc     = np.empty(len(pos), dtype=pos.dtype)
+    pc[:1] = 0
+    np.subtract(pos[1:], pos[:-1], out=pc[1:])
+    np.abs(pc, out=pc)
+
+    position_change     = pc.astype(np.float64)
+    position_change[:1] = np.nan     # undefined on the first bar, as with diff()
+    if 'turnover' in data.columns:
+        trade_cost = np.nan_to_num(data['turnover'].to_numpy(dtype=np.float64)) * cost
     else:
-        df['trade_cost'] = df['position_change'] * cost
+        trade_cost = position_change * cost
 
     if not use_precomputed:
         # ── realized sizing (single-asset strategies) ─────────────────────────
@@ -77,23 +142,30 @@ def backtest(data, cost=0.0, show_plot=True, save_html=None, show_trades=False,
         # raw_returns here are undirected (Close.pct_change); direction is applied
         # inside build_realized_equity_curve via sign(position).
         equity_curve = build_realized_equity_curve(
-            position      = eff_pos,
-            position_size = eff_size,
-            raw_returns   = raw_strategy_returns,
+            position      = pd.Series(eff_pos,              index=index),
+            position_size = pd.Series(eff_size,             index=index),
+            raw_returns   = pd.Series(raw_strategy_returns, index=index),
             cost          = cost,
         )
-        df['net_returns'] = equity_curve.pct_change().fillna(0.0)
+        net_returns = equity_curve.pct_change().fillna(0.0).to_numpy()
     else:
         # ── pairs / precomputed returns ───────────────────────────────────────
         # raw_strategy_returns is already directional (direction baked in by the
         # strategy).  Apply position gating and cost via standard MTM compounding.
-        df['strategy_returns'] = eff_pos * raw_strategy_returns
-        df['net_returns']      = df['strategy_returns'] - df['trade_cost']
-        equity_curve           = (1 + df['net_returns'].fillna(0)).cumprod()
-
-    # make a synthetic Close if missing (needed for trade logging + plots)
-    if 'Close' not in df.columns:
-        df['Close'] = equity_curve
+        if _ne is not None:
+            net_returns = _ne.evaluate('eff_pos * raw_strategy_returns - trade_cost')
+        else:
+            net_returns = eff_pos * raw_strategy_returns - trade_cost
+        equity_curve = pd.Series(np.cumprod(1.0 + np.nan_to_num(net_returns)), index=index)
+        # make a synthetic Close (needed for trade logging + plots)
+        close = equity_curve.to_numpy()
+
+    df = pd.DataFrame({
+        'Close':           data['Close'].to_numpy() if 'Close' in data.columns else close,
+        'position':        position,
+        'position_change': position_change,
+        'net_returns':     net_returns,
+    }, index=index)
 
     metrics = calculate_all_metrics(
         data=df,
@@ -102,28 +174,155 @@ def backtest(data, cost=0.0, show_plot=True, save_html=None, show_trades=False,
         strategy_type = 'pairs' if use_precomputed else 'single_asset'
     )
 
-    if show_plot or save_html:
+    # only build figures that are shown or saved: a headless worker (no TTY, no
+    # notebook) with the default show_plot=True would otherwise import plotly
+    # and render every chart just to throw it away
+    show = show_plot
+    if show:
+        from visualizer import _can_show
+        show = _can_show()
+
+    if show or save_html or save_json:
+        # imported here so non-plotting runs (sweeps) never load plotly
+        from visualizer import plot_results
+
+        if default_benchmark:
+            # computed straight from the caller's frame, uncached: caching it by
+            # id() would pin every swept frame without ever being reused
+            metrics['benchmark_equity'] = calculate_benchmark_equity(data, cache=False)
+        elif benchmark_data is not None:
+            metrics['benchmark_equity'] = calculate_benchmark_equity(benchmark_data)
+
         plot_results(
             metrics,
             benchmark_data=benchmark_data,
-            show=show_plot,
-            save_html=save_html
+            show=show,
+            save_html=save_html,
+            save_json=save_json
         )
 
-    if show_trades and 'Close' in df.columns and len(metrics['trades']) > 0:
-        trade_html = None
-        if save_html:
-            trade_html = save_html.replace('.html', '_trades.html')
+    if show_trades and len(metrics['trades']) > 0 and (show or save_html or save_json):
+        from visualizer import plot_trades_on_price
+
+        trade_html = _trades_path(save_html) if save_html else None
+        trade_json = _trades_path(save_json) if save_json else None
 
         plot_trades_on_price(
             df,
             metrics['trades'],
-            show=show_plot,
-            save_html=trade_html
+            show=show,
+            save_html=trade_html,
+            save_json=trade_json
         )
 
     return metrics
 
+
+def backtest_metrics_only(close, position, cost, periods_per_year, position_size=None):
+    """
+    Lean single-asset backtest for parameter sweeps: headline metrics only.
+
+    Works on raw arrays — no DataFrame, no trade identification, no plotting.
+    Same 1-bar execution lag, per-leg cost and realized sizing as backtest(),
+    so the numbers agree with backtest() on the same inputs.
+
+    close            : 1-D price array
+    position         : 1-D signal array (1 = long, 0 = flat, -1 = short)
+    cost             : cost fraction per unit of |position change|
+    periods_per_year : annualisation factor (see performance_metrics.infer_frequency)
+    position_size    : optional 1-D fraction-of-capital array (default 1.0)
+
+    Uses the fused numba kernel when numba is installed (or when sizing is
+    given, which the vectorized path cannot express); otherwise plain NumPy.
+
+    Returns dict with total_return, sharpe_ratio, max_drawdown, calmar_ratio.
+    """
+    close    = np.ascontiguousarray(close, dtype=np.float64)
+    position = np.ascontiguousarray(position, dtype=np.float64)
+    n        = len(close)
+
+    # the numba kernel indexes position / position_size by close's length with
+    # no bounds checks, so a short signal would read past the end of its array
+    if len(position) != n:
+        raise ValueError(f"position has {len(position)} bars but close has {n}")
+    if position_size is not None and len(position_size) != n:
+        raise ValueError(f"position_size has {len(position_size)} bars but close has {n}")
+
+    if n == 0:
+        return {'total_return': 0.0, 'sharpe_ratio': 0.0,
+                'max_drawdown': 0.0, 'calmar_ratio': 0.0}
+
+    if _HAS_NUMBA or position_size is not None:
+        from numba_kernels import _backtest_kernel
+
+        size = (np.ascontiguousarray(position_size, dtype=np.float64)
+                if position_size is not None else np.ones(n))
+        total_return, sharpe, max_drawdown, _ = _backtest_kernel(
+            close, position, size, float(cost), float(periods_per_year),
+        )
+    else:
+        eff_pos = _lag1(position)
+
+        # with size 1 the realized notional is the whole equity, so each bar's
+        # growth factor is (cost on any position change) × (directional return)
+        returns         = np.nan_to_num(_pct_change(close))
+        position_change = np.abs(np.diff(eff_pos, prepend=0.0))
+        direction       = np.sign(eff_pos)
+        if _ne is not None:
+            net_returns = _ne.evaluate('(1.0 - position_change * cost) * (1.0 + direction * returns) - 1.0')
+        else:
+            net_returns = (1.0 - position_change * cost) * (1.0 + direction * returns) - 1.0
+
+        equity = np.cumprod(1.0 + net_returns)
+
+        total_return = equity[-1] - 1.0
+
+        std    = net_returns.std(ddof=1) if n > 1 else 0.0
+        sharpe = (net_returns.mean() / std) * np.sqrt(periods_per_year) if std > 0 else 0.0
+
+        running_max  = np.maximum.accumulate(equity)
+        max_drawdown = ((equity - running_max) / running_max).min()
+
+    return {
+        'total_return': total_return,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+        'calmar_ratio': calculate_calmar_ratio(total_return, max_drawdown, periods_per_year, n),
+    }
+
+
+def backtest_metrics_grid(close, positions, cost, periods_per_year):
+    """
+    backtest_metrics_only over many signals that share one price series.
+
+    positions : 2-D array, one row per parameter combination (K × len(close)),
+                values in {-1, 0, 1} are stored as int8 to keep the K×N block
+                small; any other values (fractional, NaN) keep a float64 grid.
+
+    Rows are independent, so with numba installed they run in parallel across
+    cores.  Returns dict of length-K arrays: total_return, sharpe_ratio,
+    max_drawdown.
+    """
+    close     = np.ascontiguousarray(close, dtype=np.float64)
+    positions = np.ascontiguousarray(_narrow_position(np.atleast_2d(positions)))
+
+    # every row is read over close's length with no bounds checks in the kernel
+    if positions.shape[1] != len(close):
+        raise ValueError(f"positions rows have {positions.shape[1]} bars but close has {len(close)}")
+
+    from numba_kernels import _backtest_grid_nb
+
+    total_return, sharpe, max_drawdown = _backtest_grid_nb(
+        close, positions, float(cost), float(periods_per_year),
+    )
+
+    return {
+        'total_return': total_return,
+        'sharpe_ratio': sharpe,
+        'max_drawdown': max_drawdown,
+    }
+
+
 def build_pair_df(price_df, y_col, x_col,
                   lookback=126, z_lookback=60,
                   entry=2.0, exit=0.5,
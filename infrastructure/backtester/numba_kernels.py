@@ -0,0 +1,190 @@
+"""
+Numba kernels for the backtester's hot loops.
+
+Kept out of performance_metrics / engine so that importing those never loads
+numba; callers import this module lazily, only on the code paths that run a
+kernel.  Without numba installed, njit is a no-op and the kernels run as
+plain Python (same results, just slow).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        # no-op stand-in so the kernels below stay importable (and callable as
+        # plain Python) when numba is not installed
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+# fastmath without 'nnan'/'ninf': the kernels test for NaN explicitly, which
+# full fastmath=True would let LLVM optimise away
+_FASTMATH = {'reassoc', 'contract', 'arcp', 'nsz'}
+
+
+@njit(cache=True)
+def _identify_trades_nb(positions, closes):
+    """
+    Single-pass trade state machine over raw arrays (numba kernel).
+
+    Same entry/exit/flip semantics as identify_trades: a flip closes the open
+    trade and opens the next one on the same bar; a trade still open on the
+    last bar is dropped.  Returns (entry_idx, exit_idx, direction, pnl).
+    """
+    n = positions.shape[0]
+
+    # every closed trade ends on a position change, and bar 0 may open one
+    cap = 1
+    for i in range(1, n):
+        if positions[i] != positions[i - 1]:
+            cap += 1
+
+    entry_idx = np.empty(cap, dtype=np.int64)
+    exit_idx  = np.empty(cap, dtype=np.int64)
+    direction = np.empty(cap, dtype=np.float64)
+    pnl       = np.empty(cap, dtype=np.float64)
+
+    k               = 0
+    in_position     = False
+    entry_bar       = 0
+    entry_price     = 0.0
+    entry_direction = 0.0
+
+    for i in range(n):
+        curr = positions[i]
+
+        if in_position and curr != entry_direction:
+            entry_idx[k] = entry_bar
+            exit_idx[k]  = i
+            direction[k] = entry_direction
+            if entry_direction > 0:
+                pnl[k] = (closes[i] - entry_price) / entry_price
+            else:
+                pnl[k] = (entry_price - closes[i]) / entry_price
+            k += 1
+            in_position = False
+
+        if not in_position and curr != 0:
+            in_position     = True
+            entry_bar       = i
+            entry_price     = closes[i]
+            entry_direction = curr
+
+    return entry_idx[:k], exit_idx[:k], direction[:k], pnl[:k]
+
+
+@njit(cache=True, fastmath=_FASTMATH)
+def _backtest_kernel(close, position, position_size, cost, periods_per_year):
+    """
+    Fused single-asset metrics kernel (numba): returns → realized-sizing
+    equity → Sharpe / max drawdown in one pass over the raw arrays.
+
+    Takes the UNlagged signal arrays and applies the 1-bar execution lag
+    itself; the equity recursion is build_realized_equity_curve's, so results
+    match backtest() exactly.  Only scalars are carried across bars — no
+    per-bar allocations.
+
+    Returns (total_return, sharpe, max_drawdown, num_position_changes).
+    """
+    n = close.shape[0]
+    if n == 0:
+        return 0.0, 0.0, 0.0, 0
+
+    realized       = 1.0
+    entry_notional = 0.0
+    cum_mult       = 1.0
+    prev_pos       = 0.0
+    prev_equity    = 1.0
+    peak           = 1.0
+    max_dd         = 0.0
+    ret_mean       = 0.0      # Welford running mean / sum of squared deviations
+    ret_m2         = 0.0      # of the bar net returns, for a one-pass Sharpe
+    n_changes      = 0
+
+    for i in range(n):
+        # position / size held DURING bar i were decided on bar i-1
+        if i == 0:
+            curr_pos = 0.0
+            sz       = 0.0
+            r        = 0.0
+        else:
+            curr_pos = position[i - 1]
+            sz       = position_size[i - 1]
+            r        = close[i] / close[i - 1] - 1.0
+            if np.isnan(curr_pos):
+                curr_pos = 0.0
+            if np.isnan(sz):
+                sz = 0.0
+            if np.isnan(r):
+                r = 0.0
+            if position[i] != position[i - 1]:
+                n_changes += 1
+
+        # exit → cost → entry → earn, as in build_realized_equity_curve
+        if prev_pos != 0.0 and (curr_pos == 0.0 or curr_pos != prev_pos):
+            realized      += entry_notional * (cum_mult - 1.0)
+            entry_notional = 0.0
+            cum_mult       = 1.0
+
+        pos_chg = abs(curr_pos - prev_pos)
+        if pos_chg > 0.0:
+            realized -= pos_chg * cost * (realized + entry_notional * (cum_mult - 1.0))
+
+        if curr_pos != 0.0 and (prev_pos == 0.0 or curr_pos != prev_pos):
+            entry_notional = sz * realized
+            cum_mult       = 1.0
+
+        if curr_pos != 0.0:
+            cum_mult *= 1.0 + np.sign(curr_pos) * r
+
+        equity   = realized + entry_notional * (cum_mult - 1.0)
+        prev_pos = curr_pos
+
+        # bar net return (first bar is 0, as in equity_curve.pct_change().fillna(0))
+        net          = equity / prev_equity - 1.0
+        prev_equity  = equity
+        delta        = net - ret_mean
+        ret_mean    += delta / (i + 1)
+        ret_m2      += delta * (net - ret_mean)
+
+        if equity > peak:
+            peak = equity
+        dd = (equity - peak) / peak
+        if dd < max_dd:
+            max_dd = dd
+
+    sharpe = 0.0
+    if n > 1:
+        std = np.sqrt(ret_m2 / (n - 1))
+        if std > 0.0:
+            sharpe = ret_mean / std * np.sqrt(periods_per_year)
+
+    return prev_equity - 1.0, sharpe, max_dd, n_changes
+
+
+@njit(cache=True, parallel=True)
+def _backtest_grid_nb(close, positions, cost, periods_per_year):
+    """
+    Run _backtest_kernel for every row of positions (K parameter combinations
+    × N bars) against one shared close array, one row per thread.
+
+    Returns (total_return[K], sharpe[K], max_drawdown[K]).
+    """
+    k_rows = positions.shape[0]
+    size   = np.ones(close.shape[0])
+
+    total_return = np.empty(k_rows)
+    sharpe       = np.empty(k_rows)
+    max_dd       = np.empty(k_rows)
+
+    for k in prange(k_rows):
+        tr, sr, dd, _ = _backtest_kernel(close, positions[k], size, cost, periods_per_year)
+        total_return[k] = tr
+        sharpe[k]       = sr
+        max_dd[k]       = dd
+
+    return total_return, sharpe, max_dd
@@ -1,6 +1,16 @@
+import importlib.util
+
 import pandas as pd
 import numpy as np
 
+# numba is optional and imported only when a kernel in numba_kernels.py is
+# actually used — importing it costs ~0.2s, which plain backtests and
+# plotting-only imports should not pay.  find_spec checks without importing.
+_HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+# identify_trades switches to the numba kernel above this many bars
+_NUMBA_MIN_BARS = 200_000
+
 # Helper functions 
 
 def infer_frequency(index):
@@ -8,10 +18,13 @@ def infer_frequency(index):
     if len(index) < 2:
         return 365
     
-    time_diffs = index.to_series().diff().dropna()
-    median_diff = time_diffs.median()
-    
-    hours = median_diff.total_seconds() / 3600
+    # int64 view of the datetime64 values (zero-copy); the tick unit varies
+    # (ns / us / s) with pandas version and data source, so scale by it
+    vals = index.values
+    unit = np.datetime_data(vals.dtype)[0]
+    median_diff = np.median(np.diff(vals.view(np.int64)))
+
+    hours = median_diff / (np.timedelta64(1, 'h') / np.timedelta64(1, unit))
     
     if hours <= 1:
         return 8760
@@ -50,10 +63,19 @@ def calculate_sharpe_ratio(returns, periods_per_year):
     return sharpe
 
 
-def calculate_max_drawdown(equity_curve):
+def calculate_drawdown(equity_curve):
+
+    # np.maximum.accumulate runs as one C loop over the float64 buffer,
+    # avoiding Series.cummax dispatch and index alignment
+    vals = equity_curve.to_numpy(dtype=np.float64)
+    running_max = np.maximum.accumulate(vals)
+    drawdown = (vals - running_max) / running_max
+
+    return pd.Series(drawdown, index=equity_curve.index)
+
+
+def calculate_max_drawdown(drawdown):
 
-    running_max = equity_curve.cummax()
-    drawdown = (equity_curve - running_max) / running_max
     max_dd = drawdown.min()
     
     return max_dd
@@ -66,161 +88,155 @@ def identify_trades_pairs(data):
     (exit_equity - entry_equity) / entry_equity — the directional sign must NOT
     be flipped for shorts because the equity curve already accounts for it.
     """
-    trades = []
+    if not (data['position_change'] > 0).any():
+        return pd.DataFrame()
 
-    change_points = data[data['position_change'] > 0].copy()
+    pos    = data['position'].to_numpy()
+    closes = data['Close'].to_numpy(dtype=float)
+    index  = data.index
 
-    if len(change_points) == 0:
-        return pd.DataFrame()
+    # every trade closes on a position change, so that bounds the trade count:
+    # fill preallocated arrays by a running counter instead of appending dicts
+    cap       = int(np.count_nonzero(pos[1:] != pos[:-1]))
+    entry_idx = np.empty(cap, dtype=np.int64)
+    exit_idx  = np.empty(cap, dtype=np.int64)
+    direction = np.empty(cap, dtype=pos.dtype)
+    pnl       = np.empty(cap, dtype=np.float64)
+    k         = 0
 
-    first_pos       = data['position'].iloc[0]
+    first_pos       = pos[0]
     in_position     = first_pos != 0
-    entry_price     = data['Close'].iloc[0] if in_position else None
-    entry_direction = first_pos             if in_position else None
-    entry_time      = data.index[0]         if in_position else None
+    entry_bar       = 0
+    entry_price     = closes[0]
+    entry_direction = first_pos
 
-    for idx, row in data.iterrows():
-        current_position = row['position']
+    for i in range(len(pos)):
+        current_position = pos[i]
 
         if not in_position and current_position != 0:
             in_position     = True
-            entry_price     = row['Close']
+            entry_bar       = i
+            entry_price     = closes[i]
             entry_direction = current_position
-            entry_time      = idx
 
         elif in_position and (current_position == 0 or current_position != entry_direction):
-            exit_price = row['Close']
-            exit_time  = idx
+            exit_price = closes[i]
 
             # equity curve is already signed — always use (exit - entry) / entry
-            pnl = (exit_price - entry_price) / entry_price
-
-            trades.append({
-                'entry_time':  entry_time,
-                'exit_time':   exit_time,
-                'entry_price': entry_price,
-                'exit_price':  exit_price,
-                'direction':   'Long' if entry_direction == 1 else 'Short',
-                'pnl':         pnl,
-            })
+            entry_idx[k] = entry_bar
+            exit_idx[k]  = i
+            direction[k] = entry_direction
+            pnl[k]       = (exit_price - entry_price) / entry_price
+            k += 1
 
             if current_position != 0:
-                entry_price     = row['Close']
+                entry_bar       = i
+                entry_price     = closes[i]
                 entry_direction = current_position
-                entry_time      = idx
             else:
                 in_position = False
 
-    return pd.DataFrame(trades)
+    if k == 0:
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        'entry_time':  index[entry_idx[:k]],
+        'exit_time':   index[exit_idx[:k]],
+        'entry_price': closes[entry_idx[:k]],
+        'exit_price':  closes[exit_idx[:k]],
+        'direction':   np.where(direction[:k] == 1, 'Long', 'Short'),
+        'pnl':         pnl[:k],
+    })
 
 
 def identify_trades(data):
 
     pos    = data['position'].to_numpy()
-    closes = data['Close'].to_numpy()
+    closes = data['Close'].to_numpy(dtype=float)
     index  = data.index
 
     n = len(pos)
     if n == 0:
         return pd.DataFrame()
 
-    # prev_pos: shift right by 1; pad first element with 0 unless position already
-    # open on bar 0 (burn-in carry-over), in which case treat bar 0 as an entry.
-    prev_pos        = np.empty(n, dtype=pos.dtype)
-    prev_pos[1:]    = pos[:-1]
-    prev_pos[0]     = 0          # bar-0 handled as special entry below
+    if _HAS_NUMBA and n >= _NUMBA_MIN_BARS:
+        from numba_kernels import _identify_trades_nb
+        e, x, direction, pnl = _identify_trades_nb(pos.astype(np.float64), closes)
+    else:
+        # prev_pos: shift right by 1, padded with 0 so a position already open on
+        # bar 0 (burn-in carry-over) is treated as an entry on bar 0.
+        prev_pos        = np.empty(n, dtype=pos.dtype)
+        prev_pos[1:]    = pos[:-1]
+        prev_pos[0]     = 0
 
-    # entry: previous flat (or bar 0 already in position), current non-zero
-    entry_mask = ((prev_pos == 0) & (pos != 0))
-    # handle position already open on bar 0
-    if pos[0] != 0:
-        entry_mask[0] = True
+        changed = pos != prev_pos
 
-    # exit: was in position, now flat OR flipped direction
-    exit_mask  = (prev_pos != 0) & ((pos == 0) | (pos != prev_pos))
+        # entry: now in a position that differs from the previous bar (flat → in,
+        # or a flip, which closes one trade and opens the next on the same bar)
+        entry_idx = np.flatnonzero(changed & (pos != 0))
+        # exit: was in position, now flat OR flipped direction
+        exit_idx  = np.flatnonzero(changed & (prev_pos != 0))
 
-    entry_idx = np.where(entry_mask)[0]
-    exit_idx  = np.where(exit_mask)[0]
+        # entries and exits alternate, so each entry pairs with the first exit
+        # strictly after it; a trailing entry with no exit is still open → dropped
+        nxt  = np.searchsorted(exit_idx, entry_idx, side='right')
+        keep = nxt < len(exit_idx)
 
-    if len(entry_idx) == 0:
+        e = entry_idx[keep]
+        x = exit_idx[nxt[keep]]
+
+        # the sign of the position is the side: fractional sizes (0.5) are long
+        direction = pos[e]
+        pnl = np.where(direction > 0, closes[x] - closes[e], closes[e] - closes[x]) / closes[e]
+
+    if len(e) == 0:
         return pd.DataFrame()
 
-    # pair each entry with the next exit that comes after it
-    trades = []
-    ei = 0
-    for e in entry_idx:
-        # find first exit strictly after this entry
-        candidates = exit_idx[exit_idx > e]
-        if len(candidates) == 0:
-            break
-        x = candidates[0]
-
-        direction   = int(pos[e])
-        entry_price = float(closes[e])
-        exit_price  = float(closes[x])
-        pnl = ((exit_price - entry_price) / entry_price if direction == 1
-               else (entry_price - exit_price) / entry_price)
-
-        trades.append({
-            'entry_time':  index[e],
-            'exit_time':   index[x],
-            'entry_price': entry_price,
-            'exit_price':  exit_price,
-            'direction':   'Long' if direction == 1 else 'Short',
-            'pnl':         pnl,
-        })
-
-    return pd.DataFrame(trades)
-
-
-def calculate_win_rate(trades_df):
-
-    if len(trades_df) == 0:
-        return 0.0
-    
-    winning_trades = len(trades_df[trades_df['pnl'] > 0])
-    total_trades = len(trades_df)
-    
-    win_rate = winning_trades / total_trades
-    return win_rate
+    return pd.DataFrame({
+        'entry_time':  index[e],
+        'exit_time':   index[x],
+        'entry_price': closes[e],
+        'exit_price':  closes[x],
+        'direction':   np.where(direction > 0, 'Long', 'Short'),
+        'pnl':         pnl,
+    })
 
 
-def calculate_num_trades(trades_df):
+def _trade_stats(pnl):
+    """
+    Win rate, profit factor and avg win/loss ratio from a per-trade pnl array,
+    sharing one win/loss partition instead of re-filtering trades per metric.
+    """
+    if pnl.size == 0:
+        return {'win_rate': 0.0, 'profit_factor': 0.0, 'avg_win_loss_ratio': 0.0}
 
-    return len(trades_df)
+    wins   = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
 
+    win_rate = wins.size / pnl.size
 
-def calculate_avg_win_loss_ratio(trades_df):
+    gross_profit = wins.sum()
+    gross_loss   = -losses.sum()
+    if gross_loss == 0:
+        profit_factor = np.inf if gross_profit > 0 else 0.0
+    else:
+        profit_factor = gross_profit / gross_loss
 
-    if len(trades_df) == 0:
-        return 0.0
-    
-    winning_trades = trades_df[trades_df['pnl'] > 0]['pnl']
-    losing_trades = trades_df[trades_df['pnl'] < 0]['pnl']
-    
-    if len(winning_trades) == 0 or len(losing_trades) == 0:
-        return 0.0
-    
-    avg_win = winning_trades.mean()
-    avg_loss = abs(losing_trades.mean())
-    
-    ratio = avg_win / avg_loss
-    return ratio
+    if wins.size == 0 or losses.size == 0:
+        avg_win_loss = 0.0
+    else:
+        avg_win_loss = wins.mean() / -losses.mean()
 
+    return {
+        'win_rate': win_rate,
+        'profit_factor': profit_factor,
+        'avg_win_loss_ratio': avg_win_loss,
+    }
 
-def calculate_profit_factor(trades_df):
 
-    if len(trades_df) == 0:
-        return 0.0
-    
-    gross_profit = trades_df[trades_df['pnl'] > 0]['pnl'].sum()
-    gross_loss = abs(trades_df[trades_df['pnl'] < 0]['pnl'].sum())
-    
-    if gross_loss == 0:
-        return np.inf if gross_profit > 0 else 0.0
-    
-    profit_factor = gross_profit / gross_loss
-    return profit_factor
+def calculate_num_trades(trades_df):
+
+    return len(trades_df)
 
 
 def calculate_calmar_ratio(total_return, max_drawdown, periods_per_year, n_periods):
@@ -327,6 +343,40 @@ def build_equity_curve(returns, return_type="arithmetic"):
     return equity_curve
 
 
+# benchmark equity curves keyed by id() of the benchmark frame.  The frame
+# itself is kept in the entry so its id cannot be recycled while cached; a
+# frame mutated in place after its first use will still hit the stale curve.
+_benchmark_cache = {}
+_BENCHMARK_CACHE_SIZE = 8
+
+
+def calculate_benchmark_equity(benchmark_data, cache=True):
+    """
+    Buy & hold equity of benchmark_data['Close'], normalised to 1.0.
+
+    Sweeps pass the same benchmark frame to hundreds of backtests, so the
+    curve is computed once per frame object and reused.  Pass cache=False for
+    frames that are not reused (e.g. built per call) so they are not pinned.
+    """
+    key    = id(benchmark_data)
+    cached = _benchmark_cache.get(key) if cache else None
+    if cached is not None and cached[0] is benchmark_data:
+        return cached[1]
+
+    # upcast float32 prices (get_data(dtype=np.float32)) so the buy & hold curve
+    # compounds in float64
+    benchmark_returns = benchmark_data['Close'].astype(np.float64).pct_change()
+    benchmark_equity  = (1 + benchmark_returns).cumprod().fillna(1.0)
+
+    if not cache:
+        return benchmark_equity
+
+    if len(_benchmark_cache) >= _BENCHMARK_CACHE_SIZE:
+        _benchmark_cache.clear()
+    _benchmark_cache[key] = (benchmark_data, benchmark_equity)
+    return benchmark_equity
+
+
 def to_arithmetic_returns(returns, return_type="arithmetic"):
     """
     Convert returns to arithmetic returns for reporting metrics.
@@ -341,45 +391,28 @@ def to_arithmetic_returns(returns, return_type="arithmetic"):
 
 def calculate_yearly_metrics(returns, equity_curve, periods_per_year):
 
-    returns_by_year = returns.groupby(returns.index.year)
-    equity_by_year = equity_curve.groupby(equity_curve.index.year)
-    
-    yearly_returns = {}
-    yearly_sharpe = {}
-    yearly_max_dd = {}
-    
-    for year in returns_by_year.groups.keys():
-        year_returns = returns_by_year.get_group(year)
-        year_equity = equity_by_year.get_group(year)
-
-        start_value = year_equity.iloc[0]
-        end_value = year_equity.iloc[-1]
-
-        if start_value != 0:
-            yearly_return = (end_value - start_value) / start_value
-        else:
-            yearly_return = 0.0
-
-        yearly_returns[year] = yearly_return
-        
-        mean_ret = year_returns.mean()
-        std_ret = year_returns.std()
-
-        if std_ret > 0:
-            sharpe = (mean_ret / std_ret) * np.sqrt(periods_per_year)
-        else:
-            sharpe = 0.0
-
-        yearly_sharpe[year] = sharpe
-        
-        running_max = year_equity.cummax()
-        drawdown = (year_equity - running_max) / running_max
-        yearly_max_dd[year] = drawdown.min()
-    
+    ret_year = returns.index.year
+    eq_year  = equity_curve.index.year
+
+    # start/end equity per year in one grouped pass
+    bounds = equity_curve.groupby(eq_year).agg(['first', 'last'])
+    start  = bounds['first']
+    yearly_returns = ((bounds['last'] - start) / start.where(start != 0)).fillna(0.0)
+
+    moments = returns.groupby(ret_year).agg(['mean', 'std'])
+    std     = moments['std']
+    yearly_sharpe = ((moments['mean'] / std.where(std > 0)) * np.sqrt(periods_per_year)).fillna(0.0)
+
+    # running max resets each year, so drawdowns are measured within the year
+    running_max   = equity_curve.groupby(eq_year).cummax()
+    drawdown      = (equity_curve - running_max) / running_max
+    yearly_max_dd = drawdown.groupby(eq_year).min()
+
+    years = moments.index
     return {
-        'yearly_returns': yearly_returns,
-        'yearly_sharpe': yearly_sharpe,
-        'yearly_max_drawdown': yearly_max_dd
+        'yearly_returns': yearly_returns.reindex(years).to_dict(),
+        'yearly_sharpe': yearly_sharpe.to_dict(),
+        'yearly_max_drawdown': yearly_max_dd.reindex(years).to_dict()
     }
 
 
@@ -410,11 +443,13 @@ def calculate_all_metrics(data, net_returns, cost, return_type="arithmetic", str
     # Calculate individual metrics
     total_return = calculate_total_return(equity_curve)
     sharpe_ratio = calculate_sharpe_ratio(arith_returns, periods_per_year)
-    max_drawdown = calculate_max_drawdown(equity_curve)
-    win_rate = calculate_win_rate(trades_df)
+    drawdown = calculate_drawdown(equity_curve)   # computed once; reused by the plots
+    max_drawdown = calculate_max_drawdown(drawdown)
     num_trades = calculate_num_trades(trades_df)
-    avg_win_loss = calculate_avg_win_loss_ratio(trades_df)
-    profit_factor = calculate_profit_factor(trades_df)
+    trade_stats = _trade_stats(trades_df['pnl'].to_numpy(dtype=float) if num_trades else np.empty(0))
+    win_rate = trade_stats['win_rate']
+    avg_win_loss = trade_stats['avg_win_loss_ratio']
+    profit_factor = trade_stats['profit_factor']
     calmar_ratio = calculate_calmar_ratio(
     total_return,
     max_drawdown,
@@ -440,6 +475,7 @@ def calculate_all_metrics(data, net_returns, cost, return_type="arithmetic", str
         'yearly_max_drawdown': yearly_metrics['yearly_max_drawdown'],
         'cost_percent': cost,
         'equity_curve': equity_curve,
+        'drawdown': drawdown,
         'trades': trades_df
     }
     
@@ -0,0 +1,163 @@
+"""
+Unit tests for infrastructure/backtester/engine.py — the lean sweep paths.
+
+backtest_metrics_only and backtest_metrics_grid skip the DataFrame, trade
+identification and plotting, but must report the same headline numbers as
+backtest() on the same inputs.  Each lean path is checked against
+backtest(..., show_plot=False) on random signals: the numba kernel and the
+NumPy fallback, with and without realized position sizing, and every row of
+a parameter grid.
+
+Run from repo root:  ./.venv/bin/python -m pytest infrastructure/backtester/tests/ -q
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import engine  # noqa: E402
+from engine import _trades_path, backtest, backtest_metrics_grid, backtest_metrics_only  # noqa: E402
+from performance_metrics import infer_frequency  # noqa: E402
+
+COST    = 0.002
+N_BARS  = 3000
+METRICS = ("total_return", "sharpe_ratio", "max_drawdown", "calmar_ratio")
+
+
+def make_data(seed, n=N_BARS, sized=False):
+    """Hourly random-walk prices with random {-1, 0, 1} signals held a few bars."""
+    rng   = np.random.default_rng(seed)
+    index = pd.date_range("2022-01-01", periods=n, freq="h")
+    close = 100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.01, n))
+    # redraw the signal only every ~10 bars so trades span several bars
+    draws    = rng.choice([-1, 0, 1], size=n)
+    redraw   = rng.random(n) < 0.1
+    position = draws[np.maximum.accumulate(np.where(redraw, np.arange(n), 0))]
+
+    data = pd.DataFrame({"Close": close, "position": position}, index=index)
+    if sized:
+        data["position_size"] = rng.uniform(0.2, 1.0, n)
+    return data
+
+
+def assert_metrics_match(lean, full, keys=METRICS):
+    for key in keys:
+        assert np.isclose(lean[key], full[key], rtol=1e-7, atol=1e-10), (key, lean[key], full[key])
+
+
+@pytest.mark.parametrize("use_numba", [True, False])
+@pytest.mark.parametrize("sized", [False, True])
+@pytest.mark.parametrize("seed", range(3))
+def test_metrics_only_matches_backtest(monkeypatch, use_numba, sized, seed):
+    # without numba installed the kernel still runs through the no-op njit shim
+    monkeypatch.setattr(engine, "_HAS_NUMBA", use_numba)
+    data = make_data(seed, sized=sized)
+
+    full = backtest(data, cost=COST, show_plot=False)
+    lean = backtest_metrics_only(
+        data["Close"].to_numpy(), data["position"].to_numpy(), COST,
+        infer_frequency(data.index),
+        position_size=data["position_size"].to_numpy() if sized else None,
+    )
+
+    assert_metrics_match(lean, full)
+
+
+@pytest.mark.parametrize("use_numba", [True, False])
+@pytest.mark.parametrize("field", ["position", "position_size"])
+def test_metrics_only_rejects_mismatched_lengths(monkeypatch, use_numba, field):
+    monkeypatch.setattr(engine, "_HAS_NUMBA", use_numba)
+    close    = make_data(0, n=1000)["Close"].to_numpy()
+    position = np.ones(1000)
+    size     = np.ones(1000)
+    if field == "position":
+        position = position[:500]
+    else:
+        size = size[:500]
+
+    with pytest.raises(ValueError, match=field):
+        backtest_metrics_only(close, position, COST, 8760, position_size=size)
+
+
+def test_grid_rows_match_backtest():
+    base      = make_data(0)
+    close     = base["Close"].to_numpy()
+    positions = np.stack([make_data(seed)["position"].to_numpy() for seed in range(4)])
+
+    grid = backtest_metrics_grid(close, positions, COST, infer_frequency(base.index))
+
+    for k, row in enumerate(positions):
+        full = backtest(base.assign(position=row), cost=COST, show_plot=False)
+        assert_metrics_match({key: grid[key][k] for key in grid}, full, keys=grid)
+
+
+def test_grid_rejects_mismatched_lengths():
+    close     = make_data(0, n=1000)["Close"].to_numpy()
+    positions = np.ones((2, 500))
+
+    with pytest.raises(ValueError, match="positions"):
+        backtest_metrics_grid(close, positions, COST, 8760)
+
+
+def test_grid_keeps_fractional_signals():
+    base      = make_data(1)
+    close     = base["Close"].to_numpy()
+    positions = np.stack([base["position"].to_numpy() * 0.5, base["position"].to_numpy()])
+
+    grid = backtest_metrics_grid(close, positions, COST, infer_frequency(base.index))
+
+    half = backtest(base.assign(position=positions[0]), cost=COST, show_plot=False)
+    assert_metrics_match({key: grid[key][0] for key in grid}, half, keys=grid)
+    assert grid["total_return"][0] != grid["total_return"][1]
+
+
+def test_pairs_trades_follow_synthetic_equity():
+    # position is open on bar 0, flips long -> short on bar 2, goes flat on
+    # bar 4 and reopens on the last bar (still open, so not a trade)
+    returns  = [0.0, 0.10, -0.05, 0.02, 0.04, 0.01]
+    position = [1, 1, -1, -1, 0, 1]
+    index    = pd.date_range("2024-01-01", periods=len(returns), freq="D")
+    data     = pd.DataFrame({"strategy_returns": returns, "position": position}, index=index)
+
+    trades = backtest(data, cost=0.0, show_plot=False)["trades"]
+
+    # synthetic equity: returns are applied with the 1-bar lag, already signed
+    equity = np.cumprod([1.0, 1.10, 0.95, 0.98, 0.96, 1.0])
+    assert list(trades["entry_time"])  == [index[0], index[2]]
+    assert list(trades["exit_time"])   == [index[2], index[4]]
+    assert list(trades["direction"])   == ["Long", "Short"]
+    np.testing.assert_allclose(trades["entry_price"], [equity[0], equity[2]])
+    np.testing.assert_allclose(trades["exit_price"],  [equity[2], equity[4]])
+    # equity is already direction-adjusted, so shorts are not sign-flipped
+    np.testing.assert_allclose(trades["pnl"], [equity[2] / equity[0] - 1.0,
+                                               equity[4] / equity[2] - 1.0])
+
+
+def test_headless_backtest_builds_no_figures(monkeypatch):
+    import visualizer
+
+    def fail(*args, **kwargs):
+        raise AssertionError("figure built with nothing to show or save")
+
+    # stands in for a sweep worker with no TTY and no notebook kernel
+    monkeypatch.setattr(visualizer, "_can_show", lambda: False)
+    monkeypatch.setattr(visualizer, "plot_results", fail)
+    monkeypatch.setattr(visualizer, "plot_trades_on_price", fail)
+
+    metrics = backtest(make_data(0), cost=COST, show_plot=True, show_trades=True)
+    assert len(metrics["trades"]) > 0
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("run.json",           "run_trades.json"),
+    ("run.json.gz",        "run_trades.json.gz"),
+    ("charts/run",         "charts/run_trades"),
+    ("charts.v2/run.html", "charts.v2/run_trades.html"),
+])
+def test_trades_path_never_collides_with_main_chart(path, expected):
+    assert _trades_path(path) == expected
@@ -0,0 +1,99 @@
+"""
+Unit tests for infrastructure/backtester/performance_metrics.py — trade logs.
+
+identify_trades pairs entries with exits on the signal itself: a flip closes
+the open trade and opens the next one on the same bar, a position already open
+on bar 0 is an entry on bar 0, and a trade still open on the last bar is
+dropped.  Each case is checked against trades computed by hand on a six-bar
+price path, and the numba kernel used above _NUMBA_MIN_BARS is checked
+against the vectorized path on random signals.
+
+Run from repo root:  ./.venv/bin/python -m pytest infrastructure/backtester/tests/ -q
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import performance_metrics  # noqa: E402
+from performance_metrics import identify_trades  # noqa: E402
+
+CLOSES = [100.0, 100.0, 110.0, 120.0, 90.0, 99.0]
+INDEX  = pd.date_range("2024-01-01", periods=len(CLOSES), freq="D")
+
+
+def make_frame(position):
+    return pd.DataFrame({"Close": CLOSES, "position": position}, index=INDEX)
+
+
+def assert_trades(trades, expected):
+    """expected: list of (entry_bar, exit_bar, direction, pnl)."""
+    assert len(trades) == len(expected)
+    for (_, row), (entry, exit_, direction, pnl) in zip(trades.iterrows(), expected):
+        assert row["entry_time"]  == INDEX[entry]
+        assert row["exit_time"]   == INDEX[exit_]
+        assert row["entry_price"] == CLOSES[entry]
+        assert row["exit_price"]  == CLOSES[exit_]
+        assert row["direction"]   == direction
+        assert row["pnl"] == pytest.approx(pnl)
+
+
+def test_flip_closes_and_opens_on_same_bar():
+    trades = identify_trades(make_frame([0, 1, 1, -1, -1, 0]))
+
+    assert_trades(trades, [
+        (1, 3, "Long",  (120 - 100) / 100),
+        (3, 5, "Short", (120 - 99) / 120),
+    ])
+
+
+def test_position_open_on_bar_zero_is_an_entry():
+    trades = identify_trades(make_frame([1, 1, 0, 0, 0, 0]))
+
+    assert_trades(trades, [(0, 2, "Long", (110 - 100) / 100)])
+
+
+def test_trailing_open_trade_is_dropped():
+    trades = identify_trades(make_frame([0, 0, 1, 1, 0, -1]))
+
+    assert_trades(trades, [(2, 4, "Long", (90 - 110) / 110)])
+
+
+def test_fractional_resize_is_a_long_trade_each_leg():
+    trades = identify_trades(make_frame([0, 0.5, 0.5, 1, 1, 0]))
+
+    assert_trades(trades, [
+        (1, 3, "Long", (120 - 100) / 100),
+        (3, 5, "Long", (99 - 120) / 120),
+    ])
+
+
+def test_no_closed_trades_is_empty():
+    assert identify_trades(make_frame([0, 0, 0, 0, 0, 0])).empty
+    assert identify_trades(make_frame([0, 0, 0, 0, -1, -1])).empty
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_numba_path_matches_vectorized(monkeypatch, seed):
+    # without numba installed the kernel still runs through the no-op njit shim
+    rng   = np.random.default_rng(seed)
+    n     = 2000
+    draws = rng.choice([-1.0, -0.5, 0.0, 0.5, 1.0], size=n)
+    data  = pd.DataFrame({
+        "Close":    100.0 * np.cumprod(1.0 + rng.normal(0.0, 0.01, n)),
+        "position": draws[np.maximum.accumulate(np.where(rng.random(n) < 0.1, np.arange(n), 0))],
+    }, index=pd.date_range("2024-01-01", periods=n, freq="h"))
+
+    monkeypatch.setattr(performance_metrics, "_NUMBA_MIN_BARS", 0)
+    monkeypatch.setattr(performance_metrics, "_HAS_NUMBA", False)
+    vectorized = identify_trades(data)
+    monkeypatch.setattr(performance_metrics, "_HAS_NUMBA", True)
+    kernel = identify_trades(data)
+
+    assert len(vectorized) > 0
+    pd.testing.assert_frame_equal(kernel, vectorized)
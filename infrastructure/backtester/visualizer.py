@@ -3,14 +3,64 @@ Visualization Functions for Backtest Results
 Creates interactive Plotly charts for equity curve, drawdown, and metrics
 """
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import gzip
+import sys
+
 import pandas as pd
 import numpy as np
 
+from performance_metrics import calculate_drawdown, calculate_benchmark_equity
+
+# How saved HTML files get plotly.js: 'cdn' links it instead of inlining the
+# ~3 MB bundle into every chart.  Set to True for fully offline files.
+HTML_PLOTLYJS = 'cdn'
+
+
+# plotly is imported on first plot, not at module import: it costs hundreds of
+# ms and tens of MB, which non-plotting sweep workers should never pay
+_PLOTLY = None
+
+
+def _plotly():
+    """Return (plotly.graph_objects, make_subplots), importing them once."""
+    global _PLOTLY
+    if _PLOTLY is None:
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        _PLOTLY = (go, make_subplots)
+    return _PLOTLY
+
+
+def _can_show():
+    """True when fig.show() has somewhere to render (notebook kernel or a TTY)."""
+    if 'ipykernel' in sys.modules:
+        return True
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _save_figure(fig, save_html=None, save_json=None, label="interactive chart"):
+    """Write fig to HTML and/or Plotly JSON (gzip-compressed if the path ends in .gz)."""
+    if save_html:
+        fig.write_html(save_html, include_plotlyjs=HTML_PLOTLYJS)
+        print(f"✓ Saved {label} to: {save_html}")
+
+    if save_json:
+        # JSON keeps just the figure spec; re-render later with plotly.io.read_json
+        if save_json.endswith('.gz'):
+            with gzip.open(save_json, 'wt', encoding='utf-8') as f:
+                f.write(fig.to_json())
+        else:
+            fig.write_json(save_json)
+        print(f"✓ Saved {label} JSON to: {save_json}")
+
 
 def plot_equity_curve(equity_curve, benchmark_equity=None, title="Portfolio Equity Curve"):
 
+    go, _ = _plotly()
+
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
@@ -64,10 +114,12 @@ def plot_equity_curve(equity_curve, benchmark_equity=None, title="Portfolio Equi
     return fig
 
 
-def plot_drawdown(equity_curve, title="Portfolio Drawdown"):
+def plot_drawdown(equity_curve, title="Portfolio Drawdown", drawdown=None):
+
+    go, _ = _plotly()
 
-    running_max = equity_curve.cummax()
-    drawdown = (equity_curve - running_max) / running_max
+    if drawdown is None:
+        drawdown = calculate_drawdown(equity_curve)
     
     fig = go.Figure()
     
@@ -152,13 +204,15 @@ Avg Win/Loss: <b>{metrics['avg_win_loss_ratio']:.2f}</b>
     return main_text, yearly_returns_text, yearly_sharpe_text, trade_text
 
 
-def plot_results(metrics, benchmark_data=None, show=True, save_html=None):
+def plot_results(metrics, benchmark_data=None, show=True, save_html=None, save_json=None):
 
-    benchmark_equity = None
-    if benchmark_data is not None:
-        benchmark_returns = benchmark_data['Close'].pct_change()
-        benchmark_equity = (1 + benchmark_returns).cumprod()
-        benchmark_equity.fillna(1.0, inplace=True)
+    go, make_subplots = _plotly()
+
+    # backtest() precomputes this; callers passing their own metrics dict
+    # fall back to the (cached) computation here
+    benchmark_equity = metrics.get('benchmark_equity')
+    if benchmark_equity is None and benchmark_data is not None:
+        benchmark_equity = calculate_benchmark_equity(benchmark_data)
     
     fig = make_subplots(
         rows=2,
@@ -196,8 +250,10 @@ def plot_results(metrics, benchmark_data=None, show=True, save_html=None):
             row=1, col=1
         )
     
-    running_max = equity_curve.cummax()
-    drawdown = (equity_curve - running_max) / running_max
+    # reuse the drawdown series calculate_all_metrics already computed
+    drawdown = metrics.get('drawdown')
+    if drawdown is None:
+        drawdown = calculate_drawdown(equity_curve)
     
     fig.add_trace(
         go.Scatter(
@@ -330,17 +386,19 @@ def plot_results(metrics, benchmark_data=None, show=True, save_html=None):
     fig.update_yaxes(title_text="Equity", showgrid=True, gridwidth=1, gridcolor='#f1f5f9', row=1, col=1)
     fig.update_yaxes(title_text="Drawdown (%)", showgrid=True, gridwidth=1, gridcolor='#f1f5f9', row=2, col=1)
     
-    if save_html:
-        fig.write_html(save_html)
-        print(f"✓ Saved interactive chart to: {save_html}")
+    _save_figure(fig, save_html, save_json, label="interactive chart")
     
-    if show:
+    # headless batch runs (sweeps, scripts under nohup) would otherwise try to
+    # open a browser tab per call
+    if show and _can_show():
         fig.show()
     
     return fig
 
 
-def plot_trades_on_price(data, trades_df, show=True, save_html=None):
+def plot_trades_on_price(data, trades_df, show=True, save_html=None, save_json=None):
+
+    go, _ = _plotly()
 
     fig = go.Figure()
 
@@ -413,11 +471,9 @@ def plot_trades_on_price(data, trades_df, show=True, save_html=None):
         )
     )
     
-    if save_html:
-        fig.write_html(save_html)
-        print(f"✓ Saved trade chart to: {save_html}")
+    _save_figure(fig, save_html, save_json, label="trade chart")
     
-    if show:
+    if show and _can_show():
         fig.show()
     
     return fig
\ No newline at end of file
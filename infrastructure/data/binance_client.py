@@ -1,7 +1,11 @@
 from binance.client import Client
+from binance.exceptions import BinanceAPIException
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import yaml
 import os
+import tempfile
 
 def get_binance_client():    ### Authentication for Binance API
     
@@ -13,34 +17,110 @@ def get_binance_client():    ### Authentication for Binance API
         api_secret=config['binance']['api_secret']
     )
 
-def get_data(client, symbol, interval, lookback):   ### Fetch historical data for a given symbol, interval, and lookback period
+_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.binance_cache')
 
-    klines = client.get_historical_klines(symbol, interval, f'{lookback} days ago UTC')
-    
-    df = pd.DataFrame(klines, columns=['Time', 'Open', 'High', 'Low', 'Close', 'Volume', 
-                                       'Close_time', 'Quote_volume', 'Trades', 'Taker_base', 
-                                       'Taker_quote', 'Ignore'])
+_INTERVAL_UNITS = {'m': 'min', 'h': 'h', 'd': 'D', 'w': 'W'}
+
+def _interval_timedelta(interval):   ### Length of one Binance kline interval ('15m', '4h', '1d', '1w', '1M')
     
-    df = df[['Time', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    n, unit = int(interval[:-1]), interval[-1]
+    if unit == 'M':
+        return pd.Timedelta(days=31 * n)   # upper bound for a calendar month
+    return pd.Timedelta(n, unit=_INTERVAL_UNITS[unit])
+
+def _klines_to_df(klines):   ### Convert raw kline rows to an OHLCV DataFrame indexed by open time
     
-    df['Time'] = pd.to_datetime(df['Time'], unit='ms')
+    # kline rows are 12 fields: [open_time, open, high, low, close, volume, ...]
+    # with prices/volume as strings; cast the six columns we keep in two bulk
+    # passes instead of building a string-typed frame and re-parsing it with astype.
+    arr = np.asarray(klines, dtype=object).reshape(-1, 12)[:, :6]
     
-    df = df.set_index('Time')
+    times = pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms')
     
-    df = df.astype(float)
+    df = pd.DataFrame(arr[:, 1:6].astype(np.float64),
+                      columns=['Open', 'High', 'Low', 'Close', 'Volume'],
+                      index=pd.Index(times, name='Time'))
     
     return df
 
-def get_multiple_data(client, symbols, intervals, lookback):   ### Fetch historical data for multiple symbols and intervals, returning a dictionary of DataFrames
+def get_data(client, symbol, interval, lookback, cache_dir=_CACHE_DIR, dtype=np.float64):   ### Fetch historical data for a given symbol, interval, and lookback period (parquet-cached; cache_dir=None disables)
+
+    # dtype=np.float32 halves memory for callers that only feed backtest(), which
+    # upcasts where returns compound; anything computing spreads, indicators or
+    # return panels on the prices should keep the float64 default.  The cache
+    # always holds float64 so it can serve either.
+    if cache_dir is None:
+        return _klines_to_df(client.get_historical_klines(symbol, interval, f'{lookback} days ago UTC')).astype(dtype)
+    
+    start = pd.Timestamp.now(tz='UTC').tz_localize(None) - pd.Timedelta(days=lookback)
+    path  = os.path.join(cache_dir, f'{symbol}_{interval}.parquet')
+    
+    cached = pd.read_parquet(path) if os.path.exists(path) else None
+    
+    # the cache records the earliest start it was fetched for (parquet keeps
+    # df.attrs), so a symbol listed after that start still counts as covered.
+    # Files without it fall back to their first bar: Binance returns the first
+    # bar at or after `start`, so allow one interval of slack there.
+    if cached is not None and not cached.empty:
+        covered_from = pd.Timestamp(cached.attrs.get('covered_from',
+                                                     cached.index[0] - _interval_timedelta(interval)))
+    
+    # caches written as float32 by older versions can't serve float64 requests
+    if cached is None or cached.empty or covered_from > start or (cached.dtypes != np.float64).any():
+        # no cache, or it doesn't reach back far enough → fetch the full window
+        df           = _klines_to_df(client.get_historical_klines(symbol, interval, f'{lookback} days ago UTC'))
+        covered_from = start
+    else:
+        # closed bars are immutable: fetch only from the last cached bar onward
+        # (that bar is refetched because it may have been cached while still open)
+        since  = int(cached.index[-1].value // 10**6)
+        tail   = _klines_to_df(client.get_historical_klines(symbol, interval, since))
+        
+        # nothing new and the refetched bar unchanged → the file is already current
+        seen = tail.index.isin(cached.index)
+        if seen.all() and tail.equals(cached.loc[tail.index]):
+            return cached[cached.index >= start].astype(dtype)
+        
+        df = pd.concat([cached, tail])
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+    
+    df.attrs['covered_from'] = covered_from.isoformat()
+    
+    # write-then-rename so a crash mid-write never leaves a truncated cache file;
+    # the temp name is unique so concurrent writers of the same symbol/interval
+    # (sweep workers, repeated pairs in get_multiple_data) never share one
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.parquet')
+    os.close(fd)
+    try:
+        df.to_parquet(tmp, engine='pyarrow', compression='zstd')
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    
+    return df[df.index >= start].astype(dtype)
+
+def get_multiple_data(client, symbols, intervals, lookback, max_workers=8, cache_dir=_CACHE_DIR, dtype=np.float64):   ### Fetch historical data for multiple symbols and intervals concurrently, returning a dictionary of DataFrames
 
     if isinstance(intervals, str):
         intervals = [intervals] * len(symbols)
     
-    data_dict = {}
-    for symbol, interval in zip(symbols, intervals):
-        key = f"{symbol}_{interval}"
-        data_dict[key] = get_data(client, symbol, interval, lookback)
-        print(f"✓ Fetched {key}")
+    # requests are I/O-bound, so a small thread pool overlaps the round trips;
+    # max_workers stays low to keep under Binance's per-IP request weight limit
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            f"{symbol}_{interval}": pool.submit(get_data, client, symbol, interval, lookback, cache_dir, dtype)
+            for symbol, interval in zip(symbols, intervals)
+        }
+
+        data_dict = {}
+        for key, fut in futures.items():
+            try:
+                data_dict[key] = fut.result()
+            except BinanceAPIException as e:
+                print(f"✗ Failed {key}: {e}")
+                continue
+            print(f"✓ Fetched {key}")
     
     return data_dict
-
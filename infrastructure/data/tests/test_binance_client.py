@@ -0,0 +1,170 @@
+"""
+Unit tests for infrastructure/data/binance_client.py — the parquet kline cache.
+
+A fake client stands in for the Binance REST client: it serves interval-aligned
+klines from the requested start up to "now" and records every start argument,
+so the tests can assert which calls hit the network for the full window and
+which only fetched the tail.
+
+Run from repo root:  ./.venv/bin/python -m pytest infrastructure/data/tests/ -q
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("binance")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from binance_client import _interval_timedelta, get_data, get_multiple_data  # noqa: E402
+
+
+class FakeClient:
+    """Serves klines like get_historical_klines: first bar at or after start."""
+
+    def __init__(self, interval, listed_days_ago=None):
+        self.step  = int(_interval_timedelta(interval).total_seconds() * 1000)
+        self.now   = int(pd.Timestamp.now(tz="UTC").timestamp() * 1000)
+        self.calls = []
+        self.close = "100.25"
+        # no bars before the listing date, however far back start_str reaches
+        self.listed = (self.now - listed_days_ago * 86_400_000
+                       if listed_days_ago is not None else None)
+
+    def get_historical_klines(self, symbol, interval, start_str):
+        self.calls.append(start_str)
+        if isinstance(start_str, str):   # 'N days ago UTC'
+            start = self.now - int(start_str.split()[0]) * 86_400_000
+        else:
+            start = start_str
+        if self.listed is not None:
+            start = max(start, self.listed)
+        first = -(-start // self.step) * self.step
+        return [
+            [t, "100.5", "101", "99", self.close, "12.5", t + self.step - 1,
+             "0", 1, "0", "0", "0"]
+            for t in range(first, self.now + 1, self.step)
+        ]
+
+
+@pytest.mark.parametrize("interval", ["1d", "1h"])
+def test_warm_cache_fetches_only_tail(tmp_path, interval):
+    client = FakeClient(interval)
+
+    first  = get_data(client, "BTCUSDT", interval, 30, cache_dir=str(tmp_path))
+    second = get_data(client, "BTCUSDT", interval, 30, cache_dir=str(tmp_path))
+
+    assert client.calls[0] == "30 days ago UTC"
+    # second call resumes from the last cached bar instead of the full window
+    assert len(client.calls) == 2
+    assert client.calls[1] == int(first.index[-1].value // 10**6)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_deeper_lookback_refetches_full_window(tmp_path):
+    client = FakeClient("1d")
+
+    get_data(client, "BTCUSDT", "1d", 10, cache_dir=str(tmp_path))
+    deeper = get_data(client, "BTCUSDT", "1d", 30, cache_dir=str(tmp_path))
+
+    assert client.calls == ["10 days ago UTC", "30 days ago UTC"]
+    assert len(deeper) >= 30
+
+
+def test_symbol_listed_after_start_still_hits_cache(tmp_path):
+    client = FakeClient("1d", listed_days_ago=10)
+
+    for _ in range(3):
+        data = get_data(client, "NEWUSDT", "1d", 30, cache_dir=str(tmp_path))
+
+    # the cache can never start before the listing, but it did ask for 30 days
+    assert client.calls[0] == "30 days ago UTC"
+    assert all(isinstance(call, int) for call in client.calls[1:])
+    assert len(data) <= 11
+
+
+def test_unchanged_tail_does_not_rewrite_cache(tmp_path):
+    client = FakeClient("1h")
+    path   = tmp_path / "BTCUSDT_1h.parquet"
+
+    get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+    inode = os.stat(path).st_ino
+    get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+
+    # the cache is replaced by rename, so a rewrite would change the inode
+    assert os.stat(path).st_ino == inode
+
+
+def test_refreshed_last_bar_rewrites_cache(tmp_path):
+    client = FakeClient("1h")
+    path   = tmp_path / "BTCUSDT_1h.parquet"
+
+    get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+    client.close = "101.75"   # the last bar was cached while still open
+    data = get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+
+    assert data["Close"].iloc[-1] == pytest.approx(101.75)
+    assert pd.read_parquet(path)["Close"].iloc[-1] == pytest.approx(101.75)
+    assert pd.read_parquet(path)["Close"].iloc[0] == pytest.approx(100.25)
+
+
+def test_dtype_defaults_to_float64_and_cache_serves_both(tmp_path):
+    client = FakeClient("1h")
+    path   = tmp_path / "BTCUSDT_1h.parquet"
+
+    narrow = get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path), dtype=np.float32)
+    wide   = get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+
+    assert (narrow.dtypes == np.float32).all()
+    assert (wide.dtypes == np.float64).all()
+    assert (pd.read_parquet(path).dtypes == np.float64).all()
+    # the float32 request filled the cache, the float64 one only fetched the tail
+    assert isinstance(client.calls[1], int)
+
+
+def test_float32_cache_is_refetched_for_float64(tmp_path):
+    client = FakeClient("1h")
+    path   = tmp_path / "BTCUSDT_1h.parquet"
+
+    get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+    pd.read_parquet(path).astype(np.float32).to_parquet(path)   # older cache format
+    get_data(client, "BTCUSDT", "1h", 5, cache_dir=str(tmp_path))
+
+    assert client.calls == ["5 days ago UTC", "5 days ago UTC"]
+    assert (pd.read_parquet(path).dtypes == np.float64).all()
+
+
+def test_cache_disabled_always_fetches(tmp_path):
+    client = FakeClient("1d")
+
+    get_data(client, "BTCUSDT", "1d", 5, cache_dir=None)
+    get_data(client, "BTCUSDT", "1d", 5, cache_dir=None)
+
+    assert client.calls == ["5 days ago UTC", "5 days ago UTC"]
+    assert not os.listdir(tmp_path)
+
+
+def test_interval_timedelta():
+    assert _interval_timedelta("15m") == pd.Timedelta(minutes=15)
+    assert _interval_timedelta("4h")  == pd.Timedelta(hours=4)
+    assert _interval_timedelta("1d")  == pd.Timedelta(days=1)
+    assert _interval_timedelta("1w")  == pd.Timedelta(weeks=1)
+
+
+def test_concurrent_writers_leave_one_clean_cache_file(tmp_path):
+    client = FakeClient("1h")
+
+    # repeated pairs collapse to one key but still run as separate writers
+    data = get_multiple_data(client, ["BTCUSDT"] * 6, "1h", 5,
+                             max_workers=6, cache_dir=str(tmp_path))
+
+    assert list(data) == ["BTCUSDT_1h"]
+    assert os.listdir(tmp_path) == ["BTCUSDT_1h.parquet"]
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "BTCUSDT_1h.parquet").iloc[-len(data["BTCUSDT_1h"]):],
+        data["BTCUSDT_1h"],
+    )